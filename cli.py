@@ -16,6 +16,7 @@ from src.services.config_manager import ConfigManager
 from src.services.sync_manager import SyncManager
 from src.services.scheduler import Scheduler, create_default_scheduler
 from src.storage.database import TransactionRepository
+from src.storage.schema import cents_to_decimal
 
 
 @click.group()
@@ -200,7 +201,9 @@ def account_list(ctx, limit):
         )
         rows = cursor.fetchall()
     for row in rows:
-        click.echo(f"{row[0]} | {row[1]} | {row[2]} | {row[3]} | {row[4]} | {row[5]}")
+        # current_balance 以整数分存储，展示时转回元
+        balance = cents_to_decimal(row[4]) if row[4] is not None else None
+        click.echo(f"{row[0]} | {row[1]} | {row[2]} | {row[3]} | {balance} | {row[5]}")
 
 
 @cli.group()
@@ -217,13 +220,14 @@ def tx():
 def tx_list(ctx, limit, account_id, tx_type):
     """列出交易记录"""
     repo = ctx.obj['repo']
-    rows = repo.get_transactions(
+    # 格式化下推到 SQL（printf 投影），N 行一次性输出
+    lines = repo.get_transactions_formatted(
         account_id=account_id,
         transaction_type=tx_type,
         limit=limit,
     )
-    for r in rows:
-        click.echo(f"{r['transaction_time']} | {r['amount']} | {r.get('counterparty_name')} | {r['transaction_type']}")
+    if lines:
+        click.echo('\n'.join(lines))
 
 
 # ==================== 主入口 ====================
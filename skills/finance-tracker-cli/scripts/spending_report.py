@@ -31,8 +31,8 @@ def main() -> int:
     totals = conn.execute(
         """
         SELECT
-          COALESCE(SUM(CASE WHEN transaction_type IN ('consumption','transfer_out','fee') THEN amount ELSE 0 END), 0) AS expense,
-          COALESCE(SUM(CASE WHEN transaction_type IN ('income','transfer_in','refund','interest','dividend') THEN amount ELSE 0 END), 0) AS income,
+          COALESCE(SUM(CASE WHEN transaction_type IN ('consumption','transfer_out','fee') THEN amount ELSE 0 END), 0) / 100.0 AS expense,
+          COALESCE(SUM(CASE WHEN transaction_type IN ('income','transfer_in','refund','interest','dividend') THEN amount ELSE 0 END), 0) / 100.0 AS income,
           COUNT(*) AS tx_count
         FROM transactions
         WHERE transaction_time >= datetime('now', ?)
@@ -44,7 +44,7 @@ def main() -> int:
         """
         SELECT COALESCE(NULLIF(counterparty_name, ''), 'UNKNOWN') AS merchant,
                COUNT(*) AS tx_count,
-               ROUND(SUM(amount), 2) AS total_amount
+               ROUND(SUM(amount) / 100.0, 2) AS total_amount
         FROM transactions
         WHERE transaction_time >= datetime('now', ?)
           AND transaction_type IN ('consumption','transfer_out','fee')
@@ -55,19 +55,27 @@ def main() -> int:
         (f"-{args.days} days", args.top),
     ).fetchall()
 
-    print(f"[Spending Report] Last {args.days} days")
-    print("=" * 48)
-    print(f"Transactions: {int(totals['tx_count'])}")
-    print(f"Total Expense: {float(totals['expense']):.2f}")
-    print(f"Total Income:  {float(totals['income']):.2f}")
-    print(f"Net Cashflow:  {float(totals['income']) - float(totals['expense']):.2f}")
-    print("\nTop Merchants by Expense")
-    print("-" * 48)
+    # Buffer the report and emit it with a single write instead of one
+    # syscall per line.
+    lines = [
+        f"[Spending Report] Last {args.days} days",
+        "=" * 48,
+        f"Transactions: {int(totals['tx_count'])}",
+        f"Total Expense: {float(totals['expense']):.2f}",
+        f"Total Income:  {float(totals['income']):.2f}",
+        f"Net Cashflow:  {float(totals['income']) - float(totals['expense']):.2f}",
+        "",
+        "Top Merchants by Expense",
+        "-" * 48,
+    ]
     if not top_rows:
-        print("No expense transactions found.")
+        lines.append("No expense transactions found.")
     else:
-        for i, row in enumerate(top_rows, start=1):
-            print(f"{i:>2}. {row['merchant']:<20} {row['total_amount']:>10.2f} ({row['tx_count']} tx)")
+        lines.extend(
+            f"{i:>2}. {row['merchant']:<20} {row['total_amount']:>10.2f} ({row['tx_count']} tx)"
+            for i, row in enumerate(top_rows, start=1)
+        )
+    print("\n".join(lines))
 
     conn.close()
     return 0
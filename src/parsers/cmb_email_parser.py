@@ -3,6 +3,7 @@
 支持解析招行动账通知邮件，提取交易信息
 """
 
+import logging
 import re
 from datetime import datetime
 from decimal import Decimal
@@ -12,6 +13,58 @@ from src.models.transaction import (
     TransactionType, AccountType, CounterpartyType
 )
 
+# 逐封邮件的解析失败走 logging：批量同步时不往 stdout 刷屏
+logger = logging.getLogger(__name__)
+
+# 各邮件格式的正则源文本（合并成单个 alternation 时需要未编译的源串）
+PATTERN_SOURCES = {
+    # 快捷支付模式（最详细）
+    'quick_pay': (
+        r'您账户\*?(\d{4})于'
+        r'(\d{2})月(\d{2})日(\d{2}):(\d{2})'
+        r'在(.+?)'
+        r'快捷支付'
+        r'(\d+\.?\d*)元，'
+        r'余额(\d+\.?\d*)'
+    ),
+    # 带商户的消费
+    'merchant_consumption': (
+        r'您账户\*?(\d{4})于'
+        r'(\d{2})月(\d{2})日(\d{2}):(\d{2})'
+        r'在(.+?)'
+        r'消费'
+        r'([A-Z]{3})?\s*(\d+\.?\d*)元?'
+    ),
+    # 标准消费
+    'consumption': (
+        r'您账户\*?(\d{4})于'
+        r'(\d{2})月(\d{2})日(\d{2}):(\d{2})'
+        r'消费'
+        r'([A-Z]{3})?\s*(\d+\.?\d*)元?'
+    ),
+    # 入账
+    'income': (
+        r'您账户\*?(\d{4})于'
+        r'(\d{2})月(\d{2})日(\d{2}):(\d{2})'
+        r'入?账'
+        r'([A-Z]{3})?\s*(\d+\.?\d*)元?'
+    ),
+    # 收款
+    'income_receive': (
+        r'您账户\*?(\d{4})于'
+        r'(\d{2})月(\d{2})日(\d{2}):(\d{2})'
+        r'收款'
+        r'([A-Z]{3})?\s*(\d+\.?\d*)元?'
+    ),
+    # 转账支出
+    'transfer_out': (
+        r'您向(.+?)转账'
+        r'([A-Z]{3})?\s*(\d+\.?\d*)元?'
+    ),
+    # 余额查询
+    'balance_query': r'余额(?:为)?[:：]?\s*(\d+\.?\d*)',
+}
+
 
 class CMBEmailParser:
     """
@@ -23,71 +76,39 @@ class CMBEmailParser:
     3. 入账：您账户*1234于02月21日19:25入账CNY 1000.00
     """
     
+    # 模式优先级与对应交易类型（alternation 内按此顺序声明）
+    PATTERN_PRIORITY = (
+        ('quick_pay', TransactionType.CONSUMPTION),
+        ('merchant_consumption', TransactionType.CONSUMPTION),
+        ('consumption', TransactionType.CONSUMPTION),
+        ('income', TransactionType.INCOME),
+        ('income_receive', TransactionType.INCOME),
+        ('transfer_out', TransactionType.TRANSFER_OUT),
+    )
+
     def __init__(self):
         self.patterns = self._compile_patterns()
-    
+        self._pattern_types = dict(self.PATTERN_PRIORITY)
+        # 单个合并 alternation：一次 search 代替 O(模式数) 次顺序尝试。
+        # 各账户模式共享「您账户…于…」前缀，在同一起点上命名分支按
+        # 声明顺序尝试，与原顺序匹配的优先级语义一致。
+        # transfer_out（「您向…转账」）前缀不同，放进 alternation 会让
+        # 更靠前的最左匹配压过高优先级的账户模式，故排除在外，
+        # 仅在账户模式全部未命中后单独尝试
+        self._combined = re.compile(
+            '|'.join(
+                f'(?P<{name}>{PATTERN_SOURCES[name]})'
+                for name, _ in self.PATTERN_PRIORITY
+                if name != 'transfer_out'
+            ),
+            re.UNICODE
+        )
+
     def _compile_patterns(self) -> Dict[str, re.Pattern]:
         """编译正则表达式模式"""
         return {
-            # 快捷支付模式（最详细）
-            'quick_pay': re.compile(
-                r'您账户\*?(\d{4})于'
-                r'(\d{2})月(\d{2})日(\d{2}):(\d{2})'
-                r'在(.+?)'
-                r'快捷支付'
-                r'(\d+\.?\d*)元，'
-                r'余额(\d+\.?\d*)',
-                re.UNICODE
-            ),
-            
-            # 带商户的消费
-            'merchant_consumption': re.compile(
-                r'您账户\*?(\d{4})于'
-                r'(\d{2})月(\d{2})日(\d{2}):(\d{2})'
-                r'在(.+?)'
-                r'消费'
-                r'([A-Z]{3})?\s*(\d+\.?\d*)元?',
-                re.UNICODE
-            ),
-            
-            # 标准消费
-            'consumption': re.compile(
-                r'您账户\*?(\d{4})于'
-                r'(\d{2})月(\d{2})日(\d{2}):(\d{2})'
-                r'消费'
-                r'([A-Z]{3})?\s*(\d+\.?\d*)元?',
-                re.UNICODE
-            ),
-            
-            # 入账
-            'income': re.compile(
-                r'您账户\*?(\d{4})于'
-                r'(\d{2})月(\d{2})日(\d{2}):(\d{2})'
-                r'入?账'
-                r'([A-Z]{3})?\s*(\d+\.?\d*)元?',
-                re.UNICODE
-            ),
-            # 收款
-            'income_receive': re.compile(
-                r'您账户\*?(\d{4})于'
-                r'(\d{2})月(\d{2})日(\d{2}):(\d{2})'
-                r'收款'
-                r'([A-Z]{3})?\s*(\d+\.?\d*)元?',
-                re.UNICODE
-            ),
-            
-            # 转账支出
-            'transfer_out': re.compile(
-                r'您向(.+?)转账'
-                r'([A-Z]{3})?\s*(\d+\.?\d*)元?',
-                re.UNICODE
-            ),
-            
-            # 余额查询
-            'balance_query': re.compile(
-                r'余额(?:为)?[:：]?\s*(\d+\.?\d*)',
-                re.UNICODE
-            ),
+            name: re.compile(source, re.UNICODE)
+            for name, source in PATTERN_SOURCES.items()
         }
     
     def parse(self, email_body: str, email_subject: str = "", 
@@ -106,36 +127,57 @@ class CMBEmailParser:
         """
         # 清理文本
         text = self._clean_text(email_body)
-        
-        # 尝试按优先级匹配各种模式
-        patterns_to_try = [
-            ('quick_pay', TransactionType.CONSUMPTION),
-            ('merchant_consumption', TransactionType.CONSUMPTION),
-            ('consumption', TransactionType.CONSUMPTION),
-            ('income', TransactionType.INCOME),
-            ('income_receive', TransactionType.INCOME),
-            ('transfer_out', TransactionType.TRANSFER_OUT),
-        ]
-        
-        for pattern_name, trans_type in patterns_to_try:
-            pattern = self.patterns.get(pattern_name)
-            if not pattern:
-                continue
-            
-            match = pattern.search(text)
-            if match:
-                try:
-                    return self._build_transaction(
-                        match, pattern_name, trans_type,
-                        text, email_subject, email_from, email_date
-                    )
-                except Exception as e:
-                    print(f"解析失败 [{pattern_name}]: {e}")
-                    continue
-        
+
+        # 合并 alternation 一次扫描，命中分支由 lastgroup 给出；
+        # 账户模式全部未命中时再回落到优先级最低的 transfer_out
+        match = self._combined.search(text)
+        if match:
+            pattern_name = match.lastgroup
+        else:
+            match = self.patterns['transfer_out'].search(text)
+            pattern_name = 'transfer_out'
+        if match:
+            trans_type = self._pattern_types[pattern_name]
+            try:
+                return self._build_transaction(
+                    match, pattern_name, trans_type,
+                    text, email_subject, email_from, email_date
+                )
+            except Exception as e:
+                logger.warning("解析失败 [%s]: %s", pattern_name, e)
+                # 构建失败时回退：按优先级逐个尝试其余模式
+                for fallback_name, fallback_type in self.PATTERN_PRIORITY:
+                    if fallback_name == pattern_name:
+                        continue
+                    fallback_match = self.patterns[fallback_name].search(text)
+                    if not fallback_match:
+                        continue
+                    try:
+                        return self._build_transaction(
+                            fallback_match, fallback_name, fallback_type,
+                            text, email_subject, email_from, email_date
+                        )
+                    except Exception as e:
+                        logger.warning("解析失败 [%s]: %s", fallback_name, e)
+
         # 所有模式都匹配失败
         return None
-    
+
+    def parse_many(self, emails):
+        """批量解析邮件，惰性产出解析成功的交易
+
+        emails 为 (body, subject, from, date) 元组或纯 body 字符串的
+        可迭代对象；方法查找提升到循环外，避免逐封的属性解析开销
+        """
+        parse = self.parse
+        for email in emails:
+            if isinstance(email, str):
+                transaction = parse(email)
+            else:
+                transaction = parse(*email)
+            if transaction is not None:
+                yield transaction
+
     def _clean_text(self, text: str) -> str:
         """清理文本，移除多余空白和换行"""
         # 统一换行符
@@ -159,6 +201,11 @@ class CMBEmailParser:
         根据匹配结果构建 RawTransaction
         """
         groups = match.groups()
+        # 合并 alternation 的匹配：裁掉命名分支之前的组，使余下
+        # 索引与单模式的组编号对齐（分支自身占一个组，故从 base 起）
+        base = match.re.groupindex.get(pattern_name)
+        if base is not None:
+            groups = groups[base:]
         
         # 提取基本信息
         card_tail = self._extract_card_tail(groups, pattern_name)
@@ -212,7 +259,7 @@ class CMBEmailParser:
                     year -= 1
                 return datetime(year, month, day, hour, minute)
         except (IndexError, ValueError) as e:
-            print(f"时间解析失败: {e}")
+            logger.debug("时间解析失败: %s", e)
         
         return datetime.now()
     
@@ -228,7 +275,7 @@ class CMBEmailParser:
             elif pattern_name == 'transfer_out':
                 return Decimal(str(groups[2]))
         except (IndexError, ValueError, Decimal.InvalidOperation) as e:
-            print(f"金额解析失败: {e}")
+            logger.debug("金额解析失败: %s", e)
         
         return Decimal("0")
     
@@ -244,7 +291,7 @@ class CMBEmailParser:
             if match:
                 return Decimal(str(match.group(1)))
         except (IndexError, ValueError, Decimal.InvalidOperation) as e:
-            print(f"余额解析失败: {e}")
+            logger.debug("余额解析失败: %s", e)
         
         return None
     
@@ -283,7 +330,7 @@ class CMBEmailParser:
                 )
         
         except Exception as e:
-            print(f"对手方解析失败: {e}")
+            logger.debug("对手方解析失败: %s", e)
         
         return None
     
@@ -310,7 +357,7 @@ class CMBEmailParser:
                 return PaymentChannel(name='支付宝', provider='支付宝')
         
         except Exception as e:
-            print(f"支付渠道解析失败: {e}")
+            logger.debug("支付渠道解析失败: %s", e)
         
         return None
     
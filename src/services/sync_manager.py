@@ -2,6 +2,8 @@
 同步管理器 - 统一管理数据同步
 """
 
+import logging
+import sys
 import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
@@ -10,10 +12,15 @@ from decimal import Decimal
 from src.adapters.qqmail_adapter import QQMailIMAPAdapter
 from src.storage.database import TransactionRepository
 
+logger = logging.getLogger(__name__)
+
 
 class SyncManager:
     """同步管理器"""
-    
+
+    # 批量落库的批大小：一批一个事务，一次 fsync
+    _SYNC_BATCH_SIZE = 500
+
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self._adapters: Dict[str, Any] = {}
@@ -79,11 +86,18 @@ class SyncManager:
             if last_sync:
                 start_time = last_sync
         
-        # 获取交易数据
+        # 获取交易数据（按批落库：一批一个事务，而非逐条提交）
         new_count = 0
         duplicate_count = 0
         errors = []
-        
+        batch: List[Any] = []
+        # 账户同步水位：按批收集，所在批落库成功后才合并进 watermarks，
+        # 避免落库失败时水位越过未保存的交易导致增量同步永久漏数
+        watermarks: Dict[str, Any] = {}
+        batch_watermarks: Dict[str, Any] = {}
+        # 试运行输出先缓冲，循环结束一次性写出，避免逐行 print 拖慢拉取
+        dry_run_lines: List[str] = []
+
         try:
             for transaction in adapter.fetch_transactions(
                 start_time,
@@ -97,31 +111,50 @@ class SyncManager:
                         if getattr(transaction, "counterparty", None) is not None
                         else "未知对手方"
                     )
-                    print(f"  [试运行] {transaction.transaction_time} | {transaction.amount} | {counterparty_name}")
+                    dry_run_lines.append(
+                        f"  [试运行] {transaction.transaction_time} | {transaction.amount} | {counterparty_name}"
+                    )
                     new_count += 1
                     continue
-                
-                # 保存到数据库
-                try:
-                    saved, message = self._repo.save_transaction(transaction)
-                    if saved:
-                        new_count += 1
-                    elif message == "duplicate":
-                        duplicate_count += 1
-                        # 即使重复，也推进最后同步时间
-                        self._repo.update_account_last_sync_time(
-                            account_id=transaction.account_id,
-                            last_sync_time=transaction.transaction_time,
-                            account_name=transaction.account_name,
-                            account_type=transaction.account_type,
-                        )
-                    else:
-                        errors.append(message)
-                except Exception as e:
-                    errors.append(str(e))
-        
+
+                batch.append(transaction)
+                mark = batch_watermarks.get(transaction.account_id)
+                if mark is None or transaction.transaction_time > mark[0]:
+                    batch_watermarks[transaction.account_id] = (
+                        transaction.transaction_time,
+                        transaction.account_name,
+                        transaction.account_type,
+                    )
+                if len(batch) >= self._SYNC_BATCH_SIZE:
+                    saved, duplicates = self._save_batch(
+                        batch, batch_watermarks, watermarks, errors
+                    )
+                    new_count += saved
+                    duplicate_count += duplicates
+                    batch = []
+                    batch_watermarks = {}
+
+            if batch:
+                saved, duplicates = self._save_batch(
+                    batch, batch_watermarks, watermarks, errors
+                )
+                new_count += saved
+                duplicate_count += duplicates
+
         finally:
             adapter.close()
+
+        if dry_run_lines:
+            sys.stdout.write('\n'.join(dry_run_lines) + '\n')
+
+        # 即使全是重复，也推进账户最后同步时间（upsert 自带单调保护）
+        for acc_id, (sync_time, acc_name, acc_type) in watermarks.items():
+            self._repo.update_account_last_sync_time(
+                account_id=acc_id,
+                last_sync_time=sync_time,
+                account_name=acc_name,
+                account_type=acc_type,
+            )
         
         return {
             'source': source,
@@ -133,6 +166,30 @@ class SyncManager:
             'end_time': end_time
         }
     
+    def _save_batch(
+        self,
+        batch: List[Any],
+        batch_watermarks: Dict[str, Any],
+        watermarks: Dict[str, Any],
+        errors: List[str],
+    ) -> tuple:
+        """批量落库一段交易，成功后才合并该批的账户水位
+
+        失败时记录错误并返回 (0, 0)，水位不推进，下次增量同步
+        仍会覆盖这批未保存的交易
+        """
+        try:
+            result = self._repo.save_transactions_bulk(batch)
+        except Exception as e:
+            errors.append(str(e))
+            return 0, 0
+
+        for account_id, mark in batch_watermarks.items():
+            current = watermarks.get(account_id)
+            if current is None or mark[0] > current[0]:
+                watermarks[account_id] = mark
+        return result
+
     def _sync_all(self, days: int, dry_run: bool) -> Dict[str, Any]:
         """同步所有数据源"""
         results = {}
@@ -140,7 +197,8 @@ class SyncManager:
         total_duplicate = 0
         
         for source in self._adapters.keys():
-            print(f"\n[→] 同步 {source}...")
+            # 进度走 logging，CLI 层自行决定展示；库代码不直接写 stdout
+            logger.debug("同步 %s...", source)
             result = self._sync_single(source, days, dry_run)
             results[source] = result
             total_new += result['new']
@@ -3,15 +3,39 @@
 基于 accounts.current_balance 计算净资产
 """
 
+import logging
 import sqlite3
 import json
+import threading
 from datetime import datetime
-from decimal import Decimal
 from typing import List, Optional, Dict, Any
 from pathlib import Path
 from contextlib import contextmanager
 
-from src.storage.schema import ACCOUNTS_TABLE_SQL
+from src.storage.schema import (
+    ACCOUNTS_NET_WORTH_INDEX_SQL,
+    ACCOUNTS_TABLE_SQL,
+    cents_to_decimal,
+    decimal_to_cents,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# 总积蓄/净资产历史表（金额列为整数分，与 accounts/transactions 一致）
+NET_WORTH_HISTORY_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS net_worth_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        total_assets INTEGER NOT NULL,        -- 总资产（单位：分）
+        total_liabilities INTEGER DEFAULT 0,  -- 总负债（单位：分）
+        net_worth INTEGER NOT NULL,           -- 净资产（单位：分）
+        currency TEXT DEFAULT 'CNY',
+        calculated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        account_count INTEGER,                -- 统计的账户数量
+        breakdown TEXT,                       -- 各账户明细(JSON)
+        notes TEXT
+    )
+'''
 
 
 class BalanceTracker:
@@ -26,74 +50,131 @@ class BalanceTracker:
     def __init__(self, db_path: str = "./data/finance.db"):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # 复用单个长连接：省去每次操作的文件打开与 WAL-shm 映射开销
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
         self._init_tables()
     
     def _init_tables(self):
         """初始化余额追踪表"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            
-            # 总积蓄/净资产历史表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS net_worth_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    total_assets DECIMAL(15, 2) NOT NULL,      -- 总资产
-                    total_liabilities DECIMAL(15, 2) DEFAULT 0, -- 总负债
-                    net_worth DECIMAL(15, 2) NOT NULL,       -- 净资产
-                    currency TEXT DEFAULT 'CNY',
-                    calculated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    account_count INTEGER,                      -- 统计的账户数量
-                    breakdown TEXT,                           -- 各账户明细(JSON)
-                    notes TEXT
-                )
+
+            # 文件级调优：WAL 持久化到库文件，建表时设置一次即可
+            cursor.executescript('''
+                PRAGMA journal_mode=WAL;
+                PRAGMA synchronous=NORMAL;
+                PRAGMA temp_store=MEMORY;
+                PRAGMA cache_size=-64000;
+                PRAGMA mmap_size=268435456;
             ''')
-            
+
+            # 总积蓄/净资产历史表
+            cursor.execute(NET_WORTH_HISTORY_TABLE_SQL)
+            self._migrate_history_to_cents(cursor)
+
             # 账户配置表（用于管理账户信息）
             cursor.execute(ACCOUNTS_TABLE_SQL)
-            
+            cursor.execute(ACCOUNTS_NET_WORTH_INDEX_SQL)
+
             cursor.execute('''
                 CREATE INDEX IF NOT EXISTS idx_net_worth_date 
                 ON net_worth_history(calculated_at)
             ''')
             
             conn.commit()
-            print("[✓] 余额追踪表初始化完成")
+            logger.debug("余额追踪表初始化完成: %s", self.db_path)
+
+    def _migrate_history_to_cents(self, cursor):
+        """旧版历史表以 DECIMAL 文本存金额；按列定义识别并一次性重建为整数分"""
+        cursor.execute("PRAGMA table_info(net_worth_history)")
+        cols = {row[1]: (row[2] or '').upper() for row in cursor.fetchall()}
+        if not cols.get('total_assets', '').startswith('DECIMAL'):
+            return
+
+        # 重建三步（改名/拷贝/删旧）放进单个显式事务，保证原子性
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("ALTER TABLE net_worth_history RENAME TO net_worth_history_old")
+        cursor.execute(NET_WORTH_HISTORY_TABLE_SQL)
+        cursor.execute('''
+            INSERT INTO net_worth_history
+            (id, total_assets, total_liabilities, net_worth, currency,
+             calculated_at, account_count, breakdown, notes)
+            SELECT
+                id,
+                CAST(ROUND(total_assets * 100) AS INTEGER),
+                CAST(ROUND(total_liabilities * 100) AS INTEGER),
+                CAST(ROUND(net_worth * 100) AS INTEGER),
+                currency, calculated_at, account_count, breakdown, notes
+            FROM net_worth_history_old
+        ''')
+        cursor.execute("DROP TABLE net_worth_history_old")
+        cursor.execute("COMMIT")
     
     @contextmanager
     def _get_connection(self):
-        """获取数据库连接"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
-            yield conn
-        finally:
-            conn.close()
+        """获取数据库连接（缓存的长连接，加锁串行访问）"""
+        with self._lock:
+            if self._conn is None:
+                # isolation_level=None：手动事务模式，写路径显式 BEGIN IMMEDIATE
+                conn = sqlite3.connect(
+                    self.db_path, check_same_thread=False, isolation_level=None
+                )
+                conn.row_factory = sqlite3.Row
+                # 连接级 PRAGMA：WAL 随库文件持久化，这两项须每个连接设置
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("PRAGMA foreign_keys=ON")
+                self._conn = conn
+            yield self._conn
+
+    def close(self):
+        """关闭缓存的数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
     
     def calculate_net_worth(
         self,
         calculated_at: Optional[datetime] = None,
         notes: Optional[str] = None
-    ) -> Optional[Dict[str, Any]]:
+    ) -> Dict[str, Any]:
         """
         计算并记录净资产
-        
+
         Args:
             calculated_at: 计算时间
             notes: 备注
-        
+
         Returns:
-            净资产信息字典，失败返回 None
+            净资产信息字典；失败时回滚并上抛异常
         """
-        if calculated_at is None:
-            calculated_at = datetime.now()
-        
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            
+
             try:
-                # 获取所有账户的当前余额
+                # 读写混合：立即取写锁，避免 DEFERRED 事务中途升级触发 SQLITE_BUSY
+                cursor.execute("BEGIN IMMEDIATE")
+
+                # 资产/负债合计下推到 SQL：整数分求和精确且无逐行 Decimal 加法
+                cursor.execute('''
+                    SELECT
+                        COALESCE(SUM(CASE WHEN account_type IN ('credit', 'loan')
+                                          THEN 0 ELSE current_balance END), 0) AS assets_cents,
+                        COALESCE(SUM(CASE WHEN account_type IN ('credit', 'loan')
+                                          THEN current_balance ELSE 0 END), 0) AS liabilities_cents
+                    FROM accounts
+                    WHERE current_balance IS NOT NULL
+                      AND is_active = 1
+                      AND is_included_in_net_worth = 1
+                ''')
+                totals = cursor.fetchone()
+                total_assets = cents_to_decimal(totals['assets_cents'])
+                total_liabilities = cents_to_decimal(totals['liabilities_cents'])
+
+                # 各账户明细（仅用于 breakdown 展示）
                 cursor.execute('''
-                    SELECT 
+                    SELECT
                         account_id,
                         account_name,
                         account_type,
@@ -101,57 +182,46 @@ class BalanceTracker:
                         updated_at AS recorded_at
                     FROM accounts
                     WHERE current_balance IS NOT NULL
+                      AND is_active = 1
+                      AND is_included_in_net_worth = 1
                     ORDER BY account_id
                 ''')
-                
-                rows = cursor.fetchall()
-                
-                # 计算净资产
-                total_assets = Decimal('0')
-                total_liabilities = Decimal('0')
+
                 account_breakdown = []
-                
-                for row in rows:
-                    balance = Decimal(str(row['balance']))
-                    account_type = row['account_type'] or 'unknown'
-                    
-                    account_info = {
+                for row in cursor.fetchall():
+                    account_breakdown.append({
                         'account_id': row['account_id'],
                         'account_name': row['account_name'],
-                        'account_type': account_type,
-                        'balance': str(balance),
+                        'account_type': row['account_type'] or 'unknown',
+                        'balance': str(cents_to_decimal(row['balance'])),
                         'recorded_at': row['recorded_at']
-                    }
-                    account_breakdown.append(account_info)
-                    
-                    # 分类统计
-                    if account_type in ['credit', 'loan']:
-                        # 信用卡、贷款算作负债
-                        total_liabilities += balance
-                    else:
-                        # 其他算作资产
-                        total_assets += balance
-                
+                    })
+
                 net_worth = total_assets - total_liabilities
-                
-                # 保存到数据库
+
+                # 计算时间统一在 Python 侧补默认值：与历史行同为本地时间
+                # isoformat 文本（库端 CURRENT_TIMESTAMP 是 UTC 且空格分隔，
+                # 混入同列会破坏按文本排序的范围查询）
+                if calculated_at is None:
+                    calculated_at = datetime.now()
+
                 cursor.execute('''
                     INSERT INTO net_worth_history
                     (total_assets, total_liabilities, net_worth, calculated_at,
                      account_count, breakdown, notes)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
                 ''', (
-                    str(total_assets),
-                    str(total_liabilities),
-                    str(net_worth),
-                    calculated_at.isoformat(),
+                    decimal_to_cents(total_assets),
+                    decimal_to_cents(total_liabilities),
+                    decimal_to_cents(net_worth),
+                    calculated_at,
                     len(account_breakdown),
                     json.dumps(account_breakdown, ensure_ascii=False),
                     notes
                 ))
-                
+
                 conn.commit()
-                
+
                 # 返回结果
                 return {
                     'calculated_at': calculated_at.isoformat(),
@@ -162,12 +232,10 @@ class BalanceTracker:
                     'accounts': account_breakdown
                 }
                 
-            except Exception as e:
-                print(f"[✗] 计算净资产失败: {e}")
-                import traceback
-                traceback.print_exc()
+            except Exception:
+                # 只负责回滚，异常原样上抛，由调用方决定如何展示
                 conn.rollback()
-                return None
+                raise
     
     def get_net_worth_history(
         self,
@@ -195,11 +263,11 @@ class BalanceTracker:
             
             if start_time:
                 conditions.append('calculated_at >= ?')
-                params.append(start_time.isoformat())
-            
+                params.append(start_time)
+
             if end_time:
                 conditions.append('calculated_at <= ?')
-                params.append(end_time.isoformat())
+                params.append(end_time)
             
             # 构建 SQL
             sql = 'SELECT * FROM net_worth_history'
@@ -211,10 +279,13 @@ class BalanceTracker:
             cursor.execute(sql, params)
             rows = cursor.fetchall()
             
-            # 解析 breakdown JSON
+            # 解析 breakdown JSON，金额列由整数分转回 Decimal 元
             result = []
             for row in rows:
                 data = dict(row)
+                for money_col in ('total_assets', 'total_liabilities', 'net_worth'):
+                    if data.get(money_col) is not None:
+                        data[money_col] = cents_to_decimal(data[money_col])
                 if data.get('breakdown'):
                     import json
                     try:
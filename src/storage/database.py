@@ -3,34 +3,278 @@
 支持 SQLite（本地）和 PostgreSQL（生产）
 """
 
+import atexit
+import os
+import queue
 import sqlite3
 import json
+import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime
 from decimal import Decimal
 from pathlib import Path
-from typing import List, Optional, Dict, Any, Tuple
+from typing import Iterator, List, Optional, Dict, Any, Sequence, Tuple
 from contextlib import contextmanager
 
-from src.storage.schema import ACCOUNTS_TABLE_SQL
+from src.storage.schema import (
+    ACCOUNTS_NET_WORTH_INDEX_SQL,
+    ACCOUNTS_TABLE_SQL,
+    EXPENSE_TYPES,
+    INCOME_TYPES,
+    cents_to_decimal,
+    decimal_to_cents,
+)
 
 from src.models.transaction import RawTransaction
 
+try:
+    import orjson
+except ImportError:  # 可选依赖：缺失时退回标准库 json
+    orjson = None
+
+
+logger = logging.getLogger(__name__)
+
+
+def _dumps_json(obj: Any):
+    """序列化 metadata/tags：优先 orjson（返回 bytes，按 BLOB 存储）"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj)
+
+
+# 非唯一二级索引（批量导入时可先删除、导入后重建）
+# transaction_id 的 UNIQUE 索引不在此列——去重依赖它
+SECONDARY_INDEXES_SQL = {
+    'idx_transactions_time': '''
+        CREATE INDEX IF NOT EXISTS idx_transactions_time
+        ON transactions(transaction_time)
+    ''',
+    # 覆盖默认窄投影（DEFAULT_QUERY_COLUMNS）：按账户的列表查询走纯索引扫描
+    'idx_transactions_account_time': '''
+        CREATE INDEX IF NOT EXISTS idx_transactions_account_time
+        ON transactions(account_id, transaction_time DESC,
+                        transaction_type, amount, currency,
+                        counterparty_name, transaction_id)
+    ''',
+    'idx_transactions_type_time': '''
+        CREATE INDEX IF NOT EXISTS idx_transactions_type_time
+        ON transactions(transaction_type, transaction_time DESC)
+    ''',
+    'idx_transactions_source': '''
+        CREATE INDEX IF NOT EXISTS idx_transactions_source
+        ON transactions(source_type, source_account)
+    ''',
+}
+
+
+# 结构版本（PRAGMA user_version）：达到该版本的库跳过一次性迁移
+# 版本 2：accounts 补充列 + transactions.account_pk 外键回填
+# 版本 3：金额列由 DECIMAL 文本改为整数分
+# 版本 4：账户+时间索引扩展为覆盖默认投影
+# 版本 5：账户余额改由 AFTER INSERT 触发器维护
+# 版本 6：accounts 活跃行部分索引
+SCHEMA_VERSION = 6
+
+
+# transactions 插入列的固定顺序（executemany 与语句复用依赖稳定的列序）
+TRANSACTION_INSERT_COLUMNS = (
+    'transaction_id', 'raw_id', 'source_type', 'source_account',
+    'transaction_time', 'timezone', 'account_id', 'account_pk',
+    'account_type', 'account_name', 'transaction_type', 'amount',
+    'currency', 'balance',
+    'counterparty_name', 'counterparty_type', 'counterparty_category',
+    'channel_name', 'channel_provider', 'channel_method',
+    'location_city', 'location_country',
+    'metadata', 'raw_data', 'tags', 'notes',
+    'status', 'verification_status',
+)
+
+TRANSACTION_INSERT_SQL = (
+    f"INSERT OR IGNORE INTO transactions ({', '.join(TRANSACTION_INSERT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(TRANSACTION_INSERT_COLUMNS))})"
+)
+
+# 单条插入用 RETURNING 变体（executemany 不支持 RETURNING，批量路径仍用上面的语句）
+TRANSACTION_INSERT_RETURNING_SQL = TRANSACTION_INSERT_SQL + " RETURNING id"
+
+# 账户 upsert 语句（热路径逐行调用，统一预构建于模块层）
+ACCOUNT_UPSERT_PK_SQL = """
+    INSERT INTO accounts (account_id, account_name, account_type)
+    VALUES (?, ?, ?)
+    ON CONFLICT(account_id) DO UPDATE SET
+        account_name = COALESCE(accounts.account_name, excluded.account_name),
+        account_type = COALESCE(accounts.account_type, excluded.account_type),
+        updated_at = CURRENT_TIMESTAMP
+    RETURNING id
+"""
+
+ACCOUNT_UPSERT_LAST_SYNC_SQL = """
+    INSERT INTO accounts (account_id, account_name, account_type, last_sync_time)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(account_id) DO UPDATE SET
+        last_sync_time = CASE
+            WHEN accounts.last_sync_time IS NULL
+                 OR accounts.last_sync_time < excluded.last_sync_time
+            THEN excluded.last_sync_time
+            ELSE accounts.last_sync_time
+        END,
+        account_name = COALESCE(accounts.account_name, excluded.account_name),
+        account_type = COALESCE(accounts.account_type, excluded.account_type),
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+ACCOUNT_UPSERT_BALANCE_SQL = """
+    INSERT INTO accounts (account_id, account_name, account_type, current_balance)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(account_id) DO UPDATE SET
+        current_balance = excluded.current_balance,
+        account_name = COALESCE(accounts.account_name, excluded.account_name),
+        account_type = COALESCE(accounts.account_type, excluded.account_type),
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# 查询列白名单（列名来自调用方时防注入）
+QUERYABLE_COLUMNS = frozenset(TRANSACTION_INSERT_COLUMNS) | {
+    'id', 'record_time', 'created_at', 'updated_at',
+}
+
+# 默认查询投影：常用的窄列集，避免每行拖出 raw_data/metadata 等大字段
+DEFAULT_QUERY_COLUMNS = (
+    'transaction_id', 'transaction_time', 'account_id',
+    'transaction_type', 'amount', 'currency', 'counterparty_name',
+)
+
+
+# 交易类型列表的 SQL IN (...) 字面量（导入时构建一次，触发器定义复用）
+_EXPENSE_TYPES_SQL = ', '.join(f"'{t}'" for t in EXPENSE_TYPES)
+_INCOME_TYPES_SQL = ', '.join(f"'{t}'" for t in INCOME_TYPES)
+
+# 写入时增量维护 daily_summaries，报表查询无需再扫描 transactions 全表
+DAILY_SUMMARY_TRIGGER_SQL = f'''
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_daily_summary
+    AFTER INSERT ON transactions
+    BEGIN
+        INSERT INTO daily_summaries (date, account_id, total_expense, total_income, transaction_count)
+        VALUES (
+            DATE(NEW.transaction_time),
+            NEW.account_id,
+            CASE WHEN NEW.transaction_type IN ({_EXPENSE_TYPES_SQL})
+                 THEN NEW.amount ELSE 0 END,
+            CASE WHEN NEW.transaction_type IN ({_INCOME_TYPES_SQL})
+                 THEN NEW.amount ELSE 0 END,
+            1
+        )
+        ON CONFLICT(date) DO UPDATE SET
+            total_expense = total_expense + excluded.total_expense,
+            total_income = total_income + excluded.total_income,
+            transaction_count = transaction_count + 1,
+            updated_at = CURRENT_TIMESTAMP;
+    END
+'''
+
+# 账户余额由引擎侧维护：交易落库即更新，OR IGNORE 吸收的重复行不触发
+ACCOUNT_BALANCE_TRIGGER_SQL = f'''
+    CREATE TRIGGER IF NOT EXISTS trg_transactions_account_balance
+    AFTER INSERT ON transactions
+    BEGIN
+        UPDATE accounts
+        SET current_balance = CASE
+                WHEN NEW.balance IS NOT NULL THEN NEW.balance
+                WHEN NEW.transaction_type IN ({_EXPENSE_TYPES_SQL})
+                     THEN COALESCE(current_balance, 0) - NEW.amount
+                WHEN NEW.transaction_type IN ({_INCOME_TYPES_SQL})
+                     THEN COALESCE(current_balance, 0) + NEW.amount
+                ELSE current_balance
+            END,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE account_id = NEW.account_id;
+    END
+'''
+
 
 class TransactionRepository:
     """交易数据仓库"""
-    
+
+    # 进程内去重缓存的容量上限
+    _RECENT_IDS_MAX = 200_000
+
+    # 批量导入超过该行数时进入 _bulk_mode（先删二级索引、导入后重建）
+    _BULK_INDEX_THRESHOLD = 50_000
+
+    # 本进程已完成初始化的数据库文件，避免重复执行 DDL 和迁移
+    _initialized_paths: set = set()
+    _init_lock = threading.Lock()
+
     def __init__(self, db_path: str = "./data/finance.db"):
+        # ":memory:" 纯内存库：零磁盘 I/O，适合功能测试
+        self._is_memory = str(db_path) == ":memory:"
         self.db_path = Path(db_path)
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._init_database()
-    
+        # 最近见过的 transaction_id（有界 LRU），用于跳过重复记录的
+        # 哈希计算后的数据库探测；数据库 UNIQUE 约束仍是跨进程的最终依据
+        self._recent_ids: OrderedDict = OrderedDict()
+        # account_id -> 主键缓存（主键不会变化，仅 reset_account_cache 时失效）
+        self._account_pk_cache: Dict[str, int] = {}
+        # 单写多读：一个互斥的写连接 + 只读连接池（WAL 下读不阻塞写）
+        self._write_conn: Optional[sqlite3.Connection] = None
+        self._write_lock = threading.Lock()
+        self._read_pool: queue.LifoQueue = queue.LifoQueue(
+            maxsize=min(os.cpu_count() or 1, 8)
+        )
+        # 目录创建与建表延迟到首次取连接：只实例化不用库的路径零磁盘开销
+        self._schema_ready = False
+        self._schema_lock = threading.RLock()
+        atexit.register(self.close)
+
+    def _ensure_schema(self):
+        """惰性初始化：首次取连接时建目录、建表（可重入，线程安全）"""
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            # 先置位：_init_database 内部会重入 _get_connection
+            self._schema_ready = True
+            if not self._is_memory:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._init_database()
+
     def _init_database(self):
-        """初始化数据库表结构"""
+        """初始化数据库表结构（每个库文件每进程只执行一次）"""
+        # 内存库每个实例独立，不走「已初始化路径」缓存
+        if self._is_memory:
+            self._run_init_statements()
+            return
+
+        resolved_path = self.db_path.resolve()
+        if resolved_path in self._initialized_paths:
+            return
+
+        with self._init_lock:
+            if resolved_path in self._initialized_paths:
+                return
+            self._run_init_statements()
+            self._initialized_paths.add(resolved_path)
+
+    def _run_init_statements(self):
+        """执行建表、索引与迁移语句"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
 
+            # 文件级 PRAGMA：WAL 持久化到库文件，mmap 每进程首连接设置一次即可
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA mmap_size=268435456")
+
+            # 快路径：库已是当前结构版本时跳过全部 DDL 与迁移
+            cursor.execute("PRAGMA user_version")
+            if cursor.fetchone()[0] >= SCHEMA_VERSION:
+                logger.debug("数据库结构已是最新: %s", self.db_path)
+                return
+
             # 账户表（先创建，供交易表外键引用）
             cursor.execute(ACCOUNTS_TABLE_SQL)
+            cursor.execute(ACCOUNTS_NET_WORTH_INDEX_SQL)
 
             # 主交易表（包含 accounts 外键）
             cursor.execute('''
@@ -56,9 +300,9 @@ class TransactionRepository:
                     
                     -- 交易详情
                     transaction_type TEXT NOT NULL,
-                    amount DECIMAL(15, 2) NOT NULL,
+                    amount INTEGER NOT NULL,  -- 单位：分
                     currency TEXT DEFAULT 'CNY',
-                    balance DECIMAL(15, 2),
+                    balance INTEGER,  -- 单位：分
                     
                     -- 对手方信息（JSON 存储）
                     counterparty_name TEXT,
@@ -92,31 +336,19 @@ class TransactionRepository:
                 )
             ''')
             
-            # 创建索引
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_transactions_time 
-                ON transactions(transaction_time)
-            ''')
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_transactions_account 
-                ON transactions(account_id)
-            ''')
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_transactions_type 
-                ON transactions(transaction_type)
-            ''')
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_transactions_source 
-                ON transactions(source_type, source_account)
-            ''')
+            # 创建索引（复合索引已覆盖单列前缀，旧的单列索引一并清理）
+            cursor.execute("DROP INDEX IF EXISTS idx_transactions_account")
+            cursor.execute("DROP INDEX IF EXISTS idx_transactions_type")
+            for index_sql in SECONDARY_INDEXES_SQL.values():
+                cursor.execute(index_sql)
             
             # 日汇总表
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS daily_summaries (
                     date DATE PRIMARY KEY,
                     account_id TEXT,
-                    total_expense DECIMAL(15, 2) DEFAULT 0,
-                    total_income DECIMAL(15, 2) DEFAULT 0,
+                    total_expense INTEGER DEFAULT 0,  -- 单位：分
+                    total_income INTEGER DEFAULT 0,  -- 单位：分
                     transaction_count INTEGER DEFAULT 0,
                     top_category TEXT,
                     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
@@ -124,6 +356,10 @@ class TransactionRepository:
                 )
             ''')
             
+            # 写入时增量更新日汇总与账户余额
+            cursor.execute(DAILY_SUMMARY_TRIGGER_SQL)
+            cursor.execute(ACCOUNT_BALANCE_TRIGGER_SQL)
+
             # 处理日志表（防止重复处理）
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS processing_logs (
@@ -138,10 +374,61 @@ class TransactionRepository:
             ''')
 
             conn.commit()
-            print("[✓] 数据库初始化完成")
 
+            # DDL 之后刷新一次统计信息，让初始查询计划有据可依
+            cursor.execute("PRAGMA analysis_limit = 400")
+            cursor.execute("PRAGMA optimize")
+
+            cursor.execute("PRAGMA user_version")
+            schema_version = cursor.fetchone()[0]
+            logger.debug("数据库初始化完成: %s", self.db_path)
+
+        if schema_version < SCHEMA_VERSION:
+            self._migrate(schema_version)
+
+    def _migrate(self, from_version: int) -> None:
+        """执行一次性结构迁移，完成后写入新的 user_version"""
+        logger.debug("执行结构迁移: %s -> %s", from_version, SCHEMA_VERSION)
         self._ensure_accounts_columns()
         self._ensure_transactions_account_fk()
+        if from_version < 3:
+            self._convert_amounts_to_cents()
+        if from_version < 4:
+            # 同名索引定义变更，IF NOT EXISTS 不会重建，需显式删后重建
+            with self._get_connection() as conn:
+                conn.execute("DROP INDEX IF EXISTS idx_transactions_account_time")
+                conn.execute(SECONDARY_INDEXES_SQL['idx_transactions_account_time'])
+        with self._get_connection() as conn:
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _convert_amounts_to_cents(self) -> None:
+        """将历史库中以 DECIMAL 文本存储的金额列改写为整数分
+
+        ×100 改写是唯一不可重入的迁移步骤：版本号必须与改写同事务
+        落盘（PRAGMA user_version 参与事务），否则两者之间崩溃会让
+        下次启动重入本步骤、把所有金额再乘 100
+        """
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(
+                "UPDATE transactions SET amount = CAST(ROUND(amount * 100) AS INTEGER)"
+            )
+            cursor.execute(
+                "UPDATE transactions SET balance = CAST(ROUND(balance * 100) AS INTEGER) "
+                "WHERE balance IS NOT NULL"
+            )
+            cursor.execute(
+                "UPDATE accounts SET current_balance = CAST(ROUND(current_balance * 100) AS INTEGER) "
+                "WHERE current_balance IS NOT NULL"
+            )
+            cursor.execute(
+                "UPDATE daily_summaries SET "
+                "total_expense = CAST(ROUND(total_expense * 100) AS INTEGER), "
+                "total_income = CAST(ROUND(total_income * 100) AS INTEGER)"
+            )
+            cursor.execute("PRAGMA user_version = 3")
+            conn.commit()
 
     def _ensure_accounts_columns(self) -> None:
         """确保 accounts 表存在必要字段"""
@@ -152,7 +439,7 @@ class TransactionRepository:
             if "last_sync_time" not in cols:
                 cursor.execute("ALTER TABLE accounts ADD COLUMN last_sync_time DATETIME")
             if "current_balance" not in cols:
-                cursor.execute("ALTER TABLE accounts ADD COLUMN current_balance DECIMAL(15, 2)")
+                cursor.execute("ALTER TABLE accounts ADD COLUMN current_balance INTEGER")
             conn.commit()
 
     def _ensure_transactions_account_fk(self) -> None:
@@ -169,21 +456,20 @@ class TransactionRepository:
                 cursor.execute("ALTER TABLE transactions ADD COLUMN account_pk INTEGER")
 
             cursor.execute("SELECT DISTINCT account_id FROM transactions")
-            for (account_id,) in cursor.fetchall():
-                if not account_id:
-                    continue
-                cursor.execute(
-                    "INSERT OR IGNORE INTO accounts (account_id) VALUES (?)",
-                    (account_id,),
-                )
+            account_ids = [(row[0],) for row in cursor.fetchall() if row[0]]
+            cursor.executemany(
+                "INSERT OR IGNORE INTO accounts (account_id) VALUES (?)",
+                account_ids,
+            )
 
+            # UPDATE...FROM（SQLite 3.33+）一次连接回填，免去逐行相关子查询
             cursor.execute(
                 """
                 UPDATE transactions
-                SET account_pk = (
-                    SELECT id FROM accounts WHERE accounts.account_id = transactions.account_id
-                )
-                WHERE account_pk IS NULL
+                SET account_pk = accounts.id
+                FROM accounts
+                WHERE transactions.account_id = accounts.account_id
+                  AND transactions.account_pk IS NULL
                 """
             )
 
@@ -198,8 +484,15 @@ class TransactionRepository:
     def _rebuild_transactions_with_fk(self, conn: sqlite3.Connection) -> None:
         """重建 transactions 表以添加外键约束"""
         cursor = conn.cursor()
+        # 一次性重写窗口：关闭日志与同步，整表拷贝不必为可恢复性买单
         cursor.execute("PRAGMA foreign_keys=OFF")
+        cursor.execute("PRAGMA journal_mode")
+        previous_journal_mode = cursor.fetchone()[0]
+        cursor.execute("PRAGMA journal_mode=OFF")
+        cursor.execute("PRAGMA synchronous=OFF")
 
+        # 整个拷贝在单事务内完成，避免逐语句自动提交
+        cursor.execute("BEGIN IMMEDIATE")
         cursor.execute("ALTER TABLE transactions RENAME TO transactions_old")
 
         cursor.execute('''
@@ -221,9 +514,9 @@ class TransactionRepository:
                 account_name TEXT,
                 
                 transaction_type TEXT NOT NULL,
-                amount DECIMAL(15, 2) NOT NULL,
+                amount INTEGER NOT NULL,  -- 单位：分
                 currency TEXT DEFAULT 'CNY',
-                balance DECIMAL(15, 2),
+                balance INTEGER,  -- 单位：分
                 
                 counterparty_name TEXT,
                 counterparty_type TEXT,
@@ -280,186 +573,452 @@ class TransactionRepository:
 
         cursor.execute("DROP TABLE transactions_old")
 
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_transactions_time 
-            ON transactions(transaction_time)
-        ''')
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_transactions_account 
-            ON transactions(account_id)
-        ''')
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_transactions_type 
-            ON transactions(transaction_type)
-        ''')
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_transactions_source 
-            ON transactions(source_type, source_account)
-        ''')
+        for index_sql in SECONDARY_INDEXES_SQL.values():
+            cursor.execute(index_sql)
+
+        # 触发器随旧表一起被删除，复制完成后重建（复制过程不计入日汇总/余额）
+        cursor.execute(DAILY_SUMMARY_TRIGGER_SQL)
+        cursor.execute(ACCOUNT_BALANCE_TRIGGER_SQL)
+        conn.commit()
 
+        cursor.execute(f"PRAGMA journal_mode={previous_journal_mode}")
+        cursor.execute("PRAGMA synchronous=NORMAL")
         cursor.execute("PRAGMA foreign_keys=ON")
     
     @contextmanager
-    def _get_connection(self):
-        """获取数据库连接（上下文管理器）"""
-        conn = sqlite3.connect(self.db_path)
+    def _get_connection(self, write: bool = True):
+        """获取数据库连接（上下文管理器）
+
+        write=True 返回互斥的写连接；write=False 从只读连接池取连接，
+        WAL 模式下读连接之间、读与写之间互不阻塞
+        """
+        self._ensure_schema()
+        # 内存库只有写连接可见数据（mode=ro 会打开另一个空库），读也走写连接
+        if write or self._is_memory:
+            with self._write_lock:
+                if self._write_conn is None:
+                    self._write_conn = self._create_connection()
+                try:
+                    yield self._write_conn
+                finally:
+                    # 异常退出时不要把未决事务留在连接上
+                    if self._write_conn.in_transaction:
+                        self._write_conn.rollback()
+            return
+
+        try:
+            conn = self._read_pool.get_nowait()
+        except queue.Empty:
+            conn = self._create_read_connection()
+        try:
+            yield conn
+        finally:
+            try:
+                self._read_pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """创建带性能 PRAGMA 的写连接（手动事务模式）"""
+        conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, isolation_level=None
+        )
+        conn.row_factory = sqlite3.Row
+        self._apply_connection_pragmas(conn)
+        return conn
+
+    def _create_read_connection(self) -> sqlite3.Connection:
+        """创建只读连接（URI mode=ro，写入在连接层即被拒绝）"""
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False
+        )
         conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA busy_timeout = 5000")
+        conn.execute("PRAGMA cache_size = -64000")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def close(self) -> None:
+        """刷新查询计划统计（PRAGMA optimize）并关闭所有连接"""
+        with self._write_lock:
+            if self._write_conn is not None:
+                try:
+                    self._write_conn.execute("PRAGMA analysis_limit = 400")
+                    self._write_conn.execute("PRAGMA optimize")
+                except sqlite3.DatabaseError:
+                    pass
+                self._write_conn.close()
+                self._write_conn = None
+        while True:
+            try:
+                conn = self._read_pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+
+    @staticmethod
+    def _apply_connection_pragmas(conn: sqlite3.Connection) -> None:
+        """连接级性能 PRAGMA（WAL 模式下 synchronous=NORMAL 足够安全）"""
         conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA busy_timeout = 5000")
+        conn.execute("PRAGMA cache_size = -64000")
+        conn.execute("PRAGMA temp_store = MEMORY")
+
+    @contextmanager
+    def _bulk_mode(self, conn: sqlite3.Connection):
+        """
+        批量导入模式：先删除非唯一二级索引，导入完成后重建
+
+        逐行插入时每条记录要更新 1 个表 + 4 个索引 B 树；
+        大批量导入时先删索引、导入后一次性重建（顺序排序）更划算。
+        transaction_id 的 UNIQUE 索引保留，去重逻辑依赖它。
+        """
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA defer_foreign_keys = ON")
+        for index_name in SECONDARY_INDEXES_SQL:
+            cursor.execute(f"DROP INDEX IF EXISTS {index_name}")
         try:
             yield conn
         finally:
-            conn.close()
-    
+            for index_sql in SECONDARY_INDEXES_SQL.values():
+                cursor.execute(index_sql)
+
     def save_transaction(self, transaction: RawTransaction) -> Tuple[bool, str]:
         """
-        保存交易记录
-        
+        保存交易记录（插入与账户更新在同一个写事务内完成）
+
         Returns:
             (是否成功, 消息)
         """
         # 生成交易ID
         transaction_id = transaction.generate_transaction_id()
-        
+
+        # 进程内缓存命中：跳过数据库探测
+        if transaction_id in self._recent_ids:
+            self._recent_ids.move_to_end(transaction_id)
+            return False, "duplicate"
+
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            
+
             try:
-                # 检查是否已存在
-                cursor.execute(
-                    'SELECT id FROM transactions WHERE transaction_id = ?',
-                    (transaction_id,)
-                )
-                if cursor.fetchone():
-                    return False, "duplicate"
-                
-                account_pk = self._ensure_account(
+                cursor.execute("BEGIN IMMEDIATE")
+
+                account_pk = self._ensure_account_cursor(
+                    cursor,
                     account_id=transaction.account_id,
                     account_name=transaction.account_name,
                     account_type=transaction.account_type,
                 )
 
-                # 准备数据
-                data = self._transaction_to_db_dict(transaction, transaction_id)
-                data['account_pk'] = account_pk
-                
-                # 插入数据
-                columns = ', '.join(data.keys())
-                placeholders = ', '.join('?' for _ in data)
-                
-                cursor.execute(f'''
-                    INSERT INTO transactions ({columns})
-                    VALUES ({placeholders})
-                ''', list(data.values()))
-                
-                conn.commit()
-                self.update_account_last_sync_time(
+                # 插入数据（固定列序，复用预构建的 INSERT 语句）
+                # 去重交给 transaction_id 的 UNIQUE 约束：OR IGNORE 命中时 RETURNING 无行
+                # 账户余额由 AFTER INSERT 触发器随插入一并更新
+                row = self._transaction_to_row(transaction, transaction_id, account_pk)
+                cursor.execute(TRANSACTION_INSERT_RETURNING_SQL, row)
+                if cursor.fetchone() is None:
+                    conn.rollback()
+                    self._remember_transaction_id(transaction_id)
+                    return False, "duplicate"
+
+                self._update_last_sync_time_cursor(
+                    cursor,
                     account_id=transaction.account_id,
                     last_sync_time=transaction.transaction_time,
                     account_name=transaction.account_name,
                     account_type=transaction.account_type,
                 )
-                self._sync_current_balance(transaction)
+
+                conn.commit()
+                self._remember_transaction_id(transaction_id)
                 return True, "saved"
-                
-            except sqlite3.IntegrityError as e:
+
+            except Exception:
+                # 重复已由 OR IGNORE 吸收，走到这里说明是真正的异常；
+                # 不限于 sqlite3 错误：行构建等 Python 侧失败同样会回滚
+                # 本事务内新建的账户行，缓存必须一并失效后再上抛
                 conn.rollback()
-                return False, f"integrity_error: {e}"
-            except Exception as e:
+                self._account_pk_cache.pop(transaction.account_id, None)
+                raise
+
+    def save_transactions_bulk(
+        self, transactions: List[RawTransaction]
+    ) -> Tuple[int, int]:
+        """
+        批量保存交易（单事务 + executemany）
+
+        Returns:
+            (新增条数, 重复条数)
+        """
+        if not transactions:
+            return 0, 0
+
+        # 进程内 LRU 去重（同批内部的重复也在这里折叠）
+        pending = []
+        duplicate_count = 0
+        seen_in_batch = set()
+        for transaction in transactions:
+            transaction_id = transaction.generate_transaction_id()
+            if transaction_id in self._recent_ids or transaction_id in seen_in_batch:
+                duplicate_count += 1
+                continue
+            seen_in_batch.add(transaction_id)
+            pending.append((transaction, transaction_id))
+
+        if not pending:
+            return 0, duplicate_count
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("BEGIN IMMEDIATE")
+
+                # 先统一补齐账户，避免逐行的账户往返
+                account_pks: Dict[str, Optional[int]] = {}
+                rows = []
+                for transaction, transaction_id in pending:
+                    if transaction.account_id not in account_pks:
+                        account_pks[transaction.account_id] = self._ensure_account_cursor(
+                            cursor,
+                            account_id=transaction.account_id,
+                            account_name=transaction.account_name,
+                            account_type=transaction.account_type,
+                        )
+                    rows.append(self._transaction_to_row(
+                        transaction, transaction_id,
+                        account_pks[transaction.account_id],
+                    ))
+
+                # 库端去重交给 UNIQUE 约束（OR IGNORE），不再预查已有ID；
+                # 用主键水位回查本批真正落库的行
+                cursor.execute("SELECT COALESCE(MAX(id), 0) FROM transactions")
+                max_id_before = cursor.fetchone()[0]
+
+                if len(rows) >= self._BULK_INDEX_THRESHOLD:
+                    with self._bulk_mode(conn):
+                        cursor.executemany(TRANSACTION_INSERT_SQL, rows)
+                else:
+                    cursor.executemany(TRANSACTION_INSERT_SQL, rows)
+
+                cursor.execute(
+                    "SELECT transaction_id FROM transactions WHERE id > ?",
+                    (max_id_before,),
+                )
+                inserted_ids = {row[0] for row in cursor.fetchall()}
+                duplicate_count += len(pending) - len(inserted_ids)
+
+                # 账户余额由 AFTER INSERT 触发器逐行维护，这里只推进同步水位
+                for transaction, transaction_id in pending:
+                    if transaction_id not in inserted_ids:
+                        continue
+                    self._update_last_sync_time_cursor(
+                        cursor,
+                        account_id=transaction.account_id,
+                        last_sync_time=transaction.transaction_time,
+                        account_name=transaction.account_name,
+                        account_type=transaction.account_type,
+                    )
+
+                conn.commit()
+            except Exception:
                 conn.rollback()
-                return False, f"error: {e}"
-    
-    def _transaction_to_db_dict(self, transaction: RawTransaction, 
-                                 transaction_id: str) -> Dict[str, Any]:
-        """将 RawTransaction 转换为数据库字典"""
-        data = {
-            'transaction_id': transaction_id,
-            'raw_id': transaction.raw_id,
-            'source_type': transaction.source_type,
-            'source_account': transaction.source_account,
-            'transaction_time': transaction.transaction_time.isoformat(),
-            'timezone': transaction.timezone,
-            'account_id': transaction.account_id,
-            'account_pk': None,
-            'account_type': transaction.account_type,
-            'account_name': transaction.account_name,
-            'transaction_type': transaction.transaction_type,
-            'amount': str(transaction.amount),
-            'currency': transaction.currency,
-            'balance': str(transaction.balance) if transaction.balance else None,
-            'metadata': json.dumps(transaction.metadata) if transaction.metadata else None,
-            'raw_data': transaction.raw_data,
-            'tags': json.dumps(transaction.tags) if transaction.tags else None,
-            'notes': transaction.notes,
-            'status': transaction.status,
-            'verification_status': transaction.verification_status,
-        }
-        
-        # 对手方信息
-        if transaction.counterparty:
-            data['counterparty_name'] = transaction.counterparty.name
-            data['counterparty_type'] = transaction.counterparty.type
-            data['counterparty_category'] = transaction.counterparty.category
-        
-        # 支付渠道
-        if transaction.channel:
-            data['channel_name'] = transaction.channel.name
-            data['channel_provider'] = transaction.channel.provider
-            data['channel_method'] = transaction.channel.method
-        
-        # 位置
-        if transaction.location:
-            data['location_city'] = transaction.location.city
-            data['location_country'] = transaction.location.country
-        
-        return data
-    
+                # 回滚可能撤销本事务内新建的账户行，缓存整体失效
+                self.reset_account_cache()
+                raise
+
+        for _, transaction_id in pending:
+            self._remember_transaction_id(transaction_id)
+
+        return len(inserted_ids), duplicate_count
+
+    def _transaction_to_row(
+        self,
+        transaction: RawTransaction,
+        transaction_id: str,
+        account_pk: Optional[int],
+    ) -> Tuple:
+        """按 TRANSACTION_INSERT_COLUMNS 的固定列序生成参数元组"""
+        counterparty = transaction.counterparty
+        channel = transaction.channel
+        location = transaction.location
+        return (
+            transaction_id,
+            transaction.raw_id,
+            transaction.source_type,
+            transaction.source_account,
+            transaction.transaction_time,
+            transaction.timezone,
+            transaction.account_id,
+            account_pk,
+            transaction.account_type,
+            transaction.account_name,
+            transaction.transaction_type,
+            decimal_to_cents(transaction.amount),
+            transaction.currency,
+            decimal_to_cents(transaction.balance) if transaction.balance is not None else None,
+            counterparty.name if counterparty else None,
+            counterparty.type if counterparty else None,
+            counterparty.category if counterparty else None,
+            channel.name if channel else None,
+            channel.provider if channel else None,
+            channel.method if channel else None,
+            location.city if location else None,
+            location.country if location else None,
+            _dumps_json(transaction.metadata) if transaction.metadata else None,
+            transaction.raw_data,
+            _dumps_json(transaction.tags) if transaction.tags else None,
+            transaction.notes,
+            transaction.status,
+            transaction.verification_status,
+        )
+
+    def _remember_transaction_id(self, transaction_id: str) -> None:
+        """记录最近见过的交易ID，超出容量时淘汰最旧条目"""
+        self._recent_ids[transaction_id] = None
+        self._recent_ids.move_to_end(transaction_id)
+        if len(self._recent_ids) > self._RECENT_IDS_MAX:
+            self._recent_ids.popitem(last=False)
+
+
     def get_transactions(
         self,
         start_time: Optional[datetime] = None,
         end_time: Optional[datetime] = None,
         account_id: Optional[str] = None,
         transaction_type: Optional[str] = None,
-        limit: int = 100
-    ) -> List[Dict[str, Any]]:
-        """查询交易记录"""
-        with self._get_connection() as conn:
+        limit: int = 100,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """查询交易记录（惰性生成，逐行产出字典）
+
+        columns 为 None 时使用 DEFAULT_QUERY_COLUMNS 窄投影
+        金额列（amount/balance）由存储的整数分转回 Decimal 元
+        """
+        for row in self.get_transactions_raw(
+            start_time=start_time,
+            end_time=end_time,
+            account_id=account_id,
+            transaction_type=transaction_type,
+            limit=limit,
+            columns=columns,
+        ):
+            record = dict(row)
+            for money_col in ("amount", "balance"):
+                if record.get(money_col) is not None:
+                    record[money_col] = cents_to_decimal(record[money_col])
+            yield record
+
+    def get_transactions_raw(
+        self,
+        start_time: Optional[datetime] = None,
+        end_time: Optional[datetime] = None,
+        account_id: Optional[str] = None,
+        transaction_type: Optional[str] = None,
+        limit: int = 100,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Iterator[sqlite3.Row]:
+        """查询交易记录，直接产出 sqlite3.Row（支持按列名取值，免字典拷贝）"""
+        sql, params = self._build_transactions_query(
+            start_time, end_time, account_id, transaction_type, limit, columns
+        )
+        with self._get_connection(write=False) as conn:
             cursor = conn.cursor()
-            
-            # 构建查询条件
-            conditions = []
-            params = []
-            
-            if start_time:
-                conditions.append('transaction_time >= ?')
-                params.append(start_time.isoformat())
-            
-            if end_time:
-                conditions.append('transaction_time <= ?')
-                params.append(end_time.isoformat())
-            
-            if account_id:
-                conditions.append('account_id = ?')
-                params.append(account_id)
-            
-            if transaction_type:
-                conditions.append('transaction_type = ?')
-                params.append(transaction_type)
-            
-            # 构建 SQL
-            sql = 'SELECT * FROM transactions'
-            if conditions:
-                sql += ' WHERE ' + ' AND '.join(conditions)
-            sql += ' ORDER BY transaction_time DESC LIMIT ?'
-            params.append(limit)
-            
             cursor.execute(sql, params)
+            if not self._is_memory:
+                yield from cursor
+                return
+            # 内存库的读走写连接：先取全量结果，锁外再产出，
+            # 否则生成器挂起期间一直持有非重入的写锁，迭代中
+            # 再调用仓库写接口会死锁
             rows = cursor.fetchall()
-            
-            return [dict(row) for row in rows]
+        yield from rows
+
+    def get_transactions_formatted(
+        self,
+        account_id: Optional[str] = None,
+        transaction_type: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[str]:
+        """查询交易记录并在 SQL 端格式化为展示行
+
+        printf 投影直接产出成品字符串：免去逐行构建 Row/字典与
+        Python 端的格式化开销，调用方一次 join 即可输出
+        """
+        conditions = []
+        params: List[Any] = []
+
+        if account_id:
+            conditions.append('account_id = ?')
+            params.append(account_id)
+
+        if transaction_type:
+            conditions.append('transaction_type = ?')
+            params.append(transaction_type)
+
+        # amount 为整数分，除以 100.0 转回元展示
+        sql = (
+            "SELECT printf('%s | %.2f | %s | %s', "
+            "transaction_time, amount / 100.0, "
+            "COALESCE(counterparty_name, '未知'), transaction_type) "
+            "FROM transactions"
+        )
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY transaction_time DESC LIMIT ?'
+        params.append(limit)
+
+        with self._get_connection(write=False) as conn:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            return [row[0] for row in cursor.fetchall()]
+
+    @staticmethod
+    def _build_transactions_query(
+        start_time: Optional[datetime],
+        end_time: Optional[datetime],
+        account_id: Optional[str],
+        transaction_type: Optional[str],
+        limit: int,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Tuple[str, List[Any]]:
+        """构建交易查询 SQL 与参数"""
+        if columns is None:
+            columns = DEFAULT_QUERY_COLUMNS
+        else:
+            unknown = set(columns) - QUERYABLE_COLUMNS
+            if unknown:
+                raise ValueError(f"未知的查询列: {sorted(unknown)}")
+
+        conditions = []
+        params: List[Any] = []
+
+        if start_time:
+            conditions.append('transaction_time >= ?')
+            params.append(start_time)
+
+        if end_time:
+            conditions.append('transaction_time <= ?')
+            params.append(end_time)
+
+        if account_id:
+            conditions.append('account_id = ?')
+            params.append(account_id)
+
+        if transaction_type:
+            conditions.append('transaction_type = ?')
+            params.append(transaction_type)
+
+        sql = f"SELECT {', '.join(columns)} FROM transactions"
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY transaction_time DESC LIMIT ?'
+        params.append(limit)
+        return sql, params
 
     def get_last_sync_time(self, account_id: str) -> Optional[datetime]:
         """获取指定账户的最后同步时间"""
-        with self._get_connection() as conn:
+        with self._get_connection(write=False) as conn:
             cursor = conn.cursor()
             cursor.execute(
                 "SELECT last_sync_time FROM accounts WHERE account_id = ?",
@@ -477,7 +1036,7 @@ class TransactionRepository:
         """
         若 accounts 表仅有一条记录，返回其 account_id 与 last_sync_time
         """
-        with self._get_connection() as conn:
+        with self._get_connection(write=False) as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT account_id, last_sync_time FROM accounts")
             rows = cursor.fetchall()
@@ -501,33 +1060,30 @@ class TransactionRepository:
         """更新账户的最后同步时间（不存在则创建）"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT OR IGNORE INTO accounts (account_id, account_name, account_type)
-                VALUES (?, ?, ?)
-                """,
-                (account_id, account_name, account_type),
-            )
-            cursor.execute(
-                """
-                UPDATE accounts
-                SET last_sync_time = ?,
-                    updated_at = CURRENT_TIMESTAMP,
-                    account_name = COALESCE(account_name, ?),
-                    account_type = COALESCE(account_type, ?)
-                WHERE account_id = ?
-                  AND (last_sync_time IS NULL OR last_sync_time < ?)
-                """,
-                (
-                    last_sync_time.isoformat(),
-                    account_name,
-                    account_type,
-                    account_id,
-                    last_sync_time.isoformat(),
-                ),
+            cursor.execute("BEGIN IMMEDIATE")
+            self._update_last_sync_time_cursor(
+                cursor,
+                account_id=account_id,
+                last_sync_time=last_sync_time,
+                account_name=account_name,
+                account_type=account_type,
             )
             conn.commit()
 
+    def _update_last_sync_time_cursor(
+        self,
+        cursor: sqlite3.Cursor,
+        account_id: str,
+        last_sync_time: datetime,
+        account_name: Optional[str] = None,
+        account_type: Optional[str] = None,
+    ) -> None:
+        """在调用方事务内更新最后同步时间，不负责提交（单条 upsert）"""
+        cursor.execute(
+            ACCOUNT_UPSERT_LAST_SYNC_SQL,
+            (account_id, account_name, account_type, last_sync_time),
+        )
+
     def update_account_current_balance(
         self,
         account_id: str,
@@ -538,80 +1094,30 @@ class TransactionRepository:
         """更新账户当前余额（不存在则创建）"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT OR IGNORE INTO accounts (account_id, account_name, account_type)
-                VALUES (?, ?, ?)
-                """,
-                (account_id, account_name, account_type),
-            )
-            cursor.execute(
-                """
-                UPDATE accounts
-                SET current_balance = ?,
-                    updated_at = CURRENT_TIMESTAMP,
-                    account_name = COALESCE(account_name, ?),
-                    account_type = COALESCE(account_type, ?)
-                WHERE account_id = ?
-                """,
-                (str(current_balance), account_name, account_type, account_id),
+            cursor.execute("BEGIN IMMEDIATE")
+            self._update_current_balance_cursor(
+                cursor,
+                account_id=account_id,
+                current_balance=current_balance,
+                account_name=account_name,
+                account_type=account_type,
             )
             conn.commit()
 
-    def _sync_current_balance(self, transaction: RawTransaction) -> None:
-        """
-        同步 accounts.current_balance：
-        1) 若交易自带 balance，则直接使用
-        2) 否则按交易类型增减（基于当前余额，默认 0）
-        """
-        if transaction.balance is not None:
-            self.update_account_current_balance(
-                account_id=transaction.account_id,
-                current_balance=transaction.balance,
-                account_name=transaction.account_name,
-                account_type=transaction.account_type,
-            )
-            return
-
-        # 无 balance 时按交易类型增减
-        delta = self._infer_balance_delta(transaction)
-        if delta is None:
-            return
-
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT current_balance FROM accounts WHERE account_id = ?",
-                (transaction.account_id,),
-            )
-            row = cursor.fetchone()
-            current = Decimal(str(row[0])) if row and row[0] is not None else Decimal("0")
-
-        new_balance = current + delta
-        self.update_account_current_balance(
-            account_id=transaction.account_id,
-            current_balance=new_balance,
-            account_name=transaction.account_name,
-            account_type=transaction.account_type,
+    def _update_current_balance_cursor(
+        self,
+        cursor: sqlite3.Cursor,
+        account_id: str,
+        current_balance: Decimal,
+        account_name: Optional[str] = None,
+        account_type: Optional[str] = None,
+    ) -> None:
+        """在调用方事务内更新当前余额，不负责提交（单条 upsert）"""
+        cursor.execute(
+            ACCOUNT_UPSERT_BALANCE_SQL,
+            (account_id, account_name, account_type, decimal_to_cents(current_balance)),
         )
 
-    def _infer_balance_delta(self, transaction: RawTransaction) -> Optional[Decimal]:
-        """根据交易类型推断余额变化"""
-        tx_type = transaction.transaction_type
-        amount = transaction.amount
-        if amount is None:
-            return None
-
-        # 支出类
-        if tx_type in {"consumption", "transfer_out", "fee"}:
-            return Decimal("0") - amount
-
-        # 收入类
-        if tx_type in {"income", "transfer_in", "refund", "interest", "dividend"}:
-            return amount
-
-        return None
-
     def _ensure_account(
         self,
         account_id: str,
@@ -621,27 +1127,39 @@ class TransactionRepository:
         """确保账户存在并返回主键"""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute(
-                """
-                INSERT OR IGNORE INTO accounts (account_id, account_name, account_type)
-                VALUES (?, ?, ?)
-                """,
-                (account_id, account_name, account_type),
-            )
-            cursor.execute(
-                """
-                UPDATE accounts
-                SET account_name = COALESCE(account_name, ?),
-                    account_type = COALESCE(account_type, ?),
-                    updated_at = CURRENT_TIMESTAMP
-                WHERE account_id = ?
-                """,
-                (account_name, account_type, account_id),
-            )
-            cursor.execute(
-                "SELECT id FROM accounts WHERE account_id = ?",
-                (account_id,),
+            cursor.execute("BEGIN IMMEDIATE")
+            account_pk = self._ensure_account_cursor(
+                cursor,
+                account_id=account_id,
+                account_name=account_name,
+                account_type=account_type,
             )
-            row = cursor.fetchone()
             conn.commit()
-            return row[0] if row else None
+            return account_pk
+
+    def reset_account_cache(self) -> None:
+        """清空 account_id -> 主键缓存"""
+        self._account_pk_cache.clear()
+
+    def _ensure_account_cursor(
+        self,
+        cursor: sqlite3.Cursor,
+        account_id: str,
+        account_name: Optional[str] = None,
+        account_type: Optional[str] = None,
+    ) -> Optional[int]:
+        """在调用方事务内确保账户存在并返回主键，不负责提交"""
+        # 缓存命中：账户已存在，跳过三条语句的往返（元数据补全保持惰性）
+        cached_pk = self._account_pk_cache.get(account_id)
+        if cached_pk is not None:
+            return cached_pk
+
+        cursor.execute(
+            ACCOUNT_UPSERT_PK_SQL,
+            (account_id, account_name, account_type),
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        self._account_pk_cache[account_id] = row[0]
+        return row[0]
@@ -1,7 +1,33 @@
 """
 共享数据库表结构定义
+
+金额列统一以整数「分」存储：行更窄、比较为纯整数运算、SUM 精确无浮点误差。
+Python 侧对外仍使用 Decimal（元），转换经由下面两个辅助函数。
 """
 
+import sqlite3
+from datetime import datetime
+from decimal import Decimal
+
+# datetime 参数统一由 sqlite3 适配器转为 ISO 文本，调用处直接传对象即可
+# （金额不注册 Decimal 适配器：一律显式经 decimal_to_cents 转整数分入库）
+sqlite3.register_adapter(datetime, datetime.isoformat)
+
+# 交易类型分类：支出减少余额，收入增加余额；其余类型不影响余额
+EXPENSE_TYPES = ('consumption', 'transfer_out', 'fee')
+INCOME_TYPES = ('income', 'transfer_in', 'refund', 'interest', 'dividend')
+
+
+def decimal_to_cents(value) -> int:
+    """金额（元，Decimal/数值）转为整数分"""
+    return int((Decimal(value) * 100).to_integral_value())
+
+
+def cents_to_decimal(cents) -> Decimal:
+    """整数分转为 Decimal 元"""
+    return Decimal(cents) / 100
+
+
 ACCOUNTS_TABLE_SQL = '''
     CREATE TABLE IF NOT EXISTS accounts (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -9,7 +35,7 @@ ACCOUNTS_TABLE_SQL = '''
         account_name TEXT,
         account_type TEXT,
         institution TEXT,
-        current_balance DECIMAL(15, 2),
+        current_balance INTEGER,  -- 单位：分
         currency TEXT DEFAULT 'CNY',
         is_active BOOLEAN DEFAULT 1,
         is_included_in_net_worth BOOLEAN DEFAULT 1,
@@ -22,3 +48,10 @@ ACCOUNTS_TABLE_SQL = '''
         last_sync_time DATETIME
     )
 '''
+
+# 净资产计算的热查询走部分索引：只收录计入净资产的活跃账户行
+ACCOUNTS_NET_WORTH_INDEX_SQL = '''
+    CREATE INDEX IF NOT EXISTS idx_accounts_net_worth
+    ON accounts(account_type, current_balance)
+    WHERE is_active = 1 AND is_included_in_net_worth = 1
+'''
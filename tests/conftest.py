@@ -0,0 +1,39 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from src.models.transaction import RawTransaction, Counterparty, TransactionType
+from src.storage.database import TransactionRepository
+
+# 共享构造模板：测试只覆盖与用例相关的字段，省去逐处重复的 kwargs 样板
+_BASE_TX = dict(
+    raw_id="raw-1",
+    source_type="cmb_email",
+    source_account="test@example.com",
+    transaction_time=datetime(2026, 2, 21, 19, 25),
+    account_id="8551",
+    transaction_type=TransactionType.CONSUMPTION,
+    amount=Decimal("3.00"),
+)
+
+
+@pytest.fixture
+def memory_repo():
+    """纯内存库仓库：测试全程零磁盘 I/O，用例间相互独立"""
+    repo = TransactionRepository(db_path=":memory:")
+    yield repo
+    repo.close()
+
+
+@pytest.fixture
+def make_tx():
+    """RawTransaction 工厂：make_tx(raw_id=..., amount=...) 仅传差异字段"""
+
+    def _make(**overrides) -> RawTransaction:
+        kwargs = {**_BASE_TX, **overrides}
+        if "counterparty" not in kwargs:
+            kwargs["counterparty"] = Counterparty(name="测试商户", type="merchant")
+        return RawTransaction(**kwargs)
+
+    return _make
@@ -1,32 +1,69 @@
 from decimal import Decimal
 
+import pytest
+
 from src.parsers.cmb_email_parser import CMBEmailParser
 from src.models.transaction import TransactionType
 
 
-def test_cmb_email_quick_pay_parse():
-    parser = CMBEmailParser()
-    body = "您账户8551于02月21日19:25在财付通-微信支付-山月荟装扮快捷支付3.00元，余额100638.62"
+@pytest.fixture(scope="module")
+def parser():
+    # 模块级 fixture：正则只编译一次，各用例共享已编译的模式
+    return CMBEmailParser()
+
 
-    tx = parser.parse(body, email_subject="招商银行动账通知", email_from="notify@cmbchina.com")
+@pytest.mark.parametrize(
+    "body,subject,sender,expected_type,expected_amount,expected_counterparty,expected_channel",
+    [
+        (
+            "您账户8551于02月21日19:25在财付通-微信支付-山月荟装扮快捷支付3.00元，余额100638.62",
+            "招商银行动账通知",
+            "notify@cmbchina.com",
+            TransactionType.CONSUMPTION,
+            Decimal("3.00"),
+            "山月荟装扮",
+            "微信支付",
+        ),
+        (
+            "您账户8551于02月22日14:12收款10.00元，余额100719.62，备注：财付通-张子鸣-微信零钱提现",
+            "一卡通账户变动通知",
+            "95555@message.cmbchina.com",
+            TransactionType.INCOME,
+            Decimal("10.00"),
+            None,
+            None,
+        ),
+    ],
+    ids=["quick_pay", "income_receive"],
+)
+def test_cmb_email_parse(
+    parser, body, subject, sender,
+    expected_type, expected_amount, expected_counterparty, expected_channel,
+):
+    tx = parser.parse(body, email_subject=subject, email_from=sender)
 
     assert tx is not None
     assert tx.account_id == "8551"
-    assert tx.transaction_type == TransactionType.CONSUMPTION
-    assert tx.amount == Decimal("3.00")
-    assert tx.counterparty is not None
-    assert tx.counterparty.name == "山月荟装扮"
-    assert tx.channel is not None
-    assert tx.channel.name == "微信支付"
+    assert tx.transaction_type == expected_type
+    assert tx.amount == expected_amount
+    if expected_counterparty is not None:
+        assert tx.counterparty is not None
+        assert tx.counterparty.name == expected_counterparty
+    if expected_channel is not None:
+        assert tx.channel is not None
+        assert tx.channel.name == expected_channel
 
 
-def test_cmb_email_income_receive_parse():
-    parser = CMBEmailParser()
-    body = "您账户8551于02月22日14:12收款10.00元，余额100719.62，备注：财付通-张子鸣-微信零钱提现"
+def test_cmb_email_parse_many(parser):
+    bodies = [
+        "您账户8551于02月21日19:25在财付通-微信支付-山月荟装扮快捷支付3.00元，余额100638.62",
+        "无关邮件内容",
+        "您账户8551于02月22日14:12收款10.00元，余额100719.62",
+    ]
 
-    tx = parser.parse(body, email_subject="一卡通账户变动通知", email_from="95555@message.cmbchina.com")
+    txs = list(parser.parse_many(bodies))
 
-    assert tx is not None
-    assert tx.account_id == "8551"
-    assert tx.transaction_type == TransactionType.INCOME
-    assert tx.amount == Decimal("10.00")
+    # 解析失败的邮件被跳过，不产出 None
+    assert len(txs) == 2
+    assert txs[0].amount == Decimal("3.00")
+    assert txs[1].amount == Decimal("10.00")
@@ -1,25 +1,10 @@
 from datetime import datetime
-from decimal import Decimal
-from pathlib import Path
 
-from src.storage.database import TransactionRepository
-from src.models.transaction import RawTransaction, Counterparty, TransactionType
 
+def test_transaction_repository_save_and_dedupe(memory_repo, make_tx):
+    repo = memory_repo
 
-def test_transaction_repository_save_and_dedupe(tmp_path: Path):
-    db_path = tmp_path / "finance.db"
-    repo = TransactionRepository(db_path=str(db_path))
-
-    tx = RawTransaction(
-        raw_id="raw-1",
-        source_type="cmb_email",
-        source_account="test@example.com",
-        transaction_time=datetime(2026, 2, 21, 19, 25),
-        account_id="8551",
-        transaction_type=TransactionType.CONSUMPTION,
-        amount=Decimal("3.00"),
-        counterparty=Counterparty(name="测试商户", type="merchant"),
-    )
+    tx = make_tx()
 
     saved, message = repo.save_transaction(tx)
     assert saved is True
@@ -29,7 +14,7 @@ def test_transaction_repository_save_and_dedupe(tmp_path: Path):
     assert saved2 is False
     assert message2 == "duplicate"
 
-    # current_balance should be updated (consumption => negative delta)
+    # current_balance should be updated (consumption => negative delta, stored in cents)
     with repo._get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute(
@@ -38,4 +23,43 @@ def test_transaction_repository_save_and_dedupe(tmp_path: Path):
         )
         row = cursor.fetchone()
         assert row is not None
-        assert Decimal(str(row[0])) == Decimal("-3.00")
+        assert row[0] == -300
+
+
+def test_transaction_repository_bulk_save(memory_repo, make_tx):
+    repo = memory_repo
+
+    txs = [
+        make_tx(
+            raw_id=f"raw-{i}",
+            transaction_time=datetime(2026, 2, 21, 19, 25 + i),
+        )
+        for i in range(3)
+    ]
+
+    # 批量保存：一个事务、一次提交
+    saved, duplicates = repo.save_transactions_bulk(txs)
+    assert saved == 3
+    assert duplicates == 0
+
+    # 余额由触发器逐行维护：3 笔消费各 -300 分
+    with repo._get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT current_balance FROM accounts WHERE account_id = ?",
+            ("8551",),
+        )
+        assert cursor.fetchone()[0] == -900
+
+    # 重复批次：整批去重，余额不被二次扣减
+    saved2, duplicates2 = repo.save_transactions_bulk(txs)
+    assert saved2 == 0
+    assert duplicates2 == 3
+
+    with repo._get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT current_balance FROM accounts WHERE account_id = ?",
+            ("8551",),
+        )
+        assert cursor.fetchone()[0] == -900